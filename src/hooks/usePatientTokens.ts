@@ -1,5 +1,5 @@
 
-import { useState } from "react";
+import { useCallback, useState } from "react";
 import { supabase } from "@/integrations/supabase/client";
 import { toast } from "sonner";
 
@@ -51,25 +51,17 @@ export const usePatientTokens = () => {
     }
   };
 
-  const getPatientByToken = async (token: string) => {
+  // Verificação feita pela edge function, que mantém cache dos tokens válidos
+  const getPatientByToken = useCallback(async (token: string) => {
     try {
       setLoading(true);
 
-      const { data, error } = await supabase
-        .from("patient_access_tokens")
-        .select(`
-          *,
-          patient:patients(*),
-          event_date:event_dates(
-            *,
-            event:events(*)
-          )
-        `)
-        .eq("token", token)
-        .gt("expires_at", new Date().toISOString())
-        .single();
+      const { data, error } = await supabase.functions.invoke("verify-patient-token", {
+        body: { token }
+      });
 
       if (error) {throw error;}
+      if (!data?.valid) {return null;}
 
       return data;
     } catch (error) {
@@ -78,7 +70,7 @@ export const usePatientTokens = () => {
     } finally {
       setLoading(false);
     }
-  };
+  }, []);
 
   return {
     loading,
@@ -0,0 +1,142 @@
+/**
+ * Tests for Patient Token Verifier
+ */
+
+import { beforeEach, describe, expect, it, vi } from 'vitest';
+import { hashToken, PatientTokenRecord, PatientTokenVerifier } from '../patientTokenVerifier.ts';
+import { LruTtlCache } from '../tokenCache.ts';
+
+describe('LruTtlCache', () => {
+  let now: number;
+
+  beforeEach(() => {
+    now = 0;
+  });
+
+  it('should evict the least recently used entry when full', () => {
+    const cache = new LruTtlCache<number>({ maxEntries: 2, defaultTtlMs: 1000, now: () => now });
+
+    cache.set('a', 1);
+    cache.set('b', 2);
+    cache.get('a');
+    cache.set('c', 3);
+
+    expect(cache.get('a')).toBe(1);
+    expect(cache.get('b')).toBeUndefined();
+    expect(cache.get('c')).toBe(3);
+  });
+
+  it('should expire entries after their TTL', () => {
+    const cache = new LruTtlCache<number>({ maxEntries: 10, defaultTtlMs: 1000, now: () => now });
+
+    cache.set('a', 1);
+    cache.set('b', 2, 5000);
+    now = 1000;
+
+    expect(cache.get('a')).toBeUndefined();
+    expect(cache.get('b')).toBe(2);
+    expect(cache.size).toBe(1);
+  });
+});
+
+describe('PatientTokenVerifier', () => {
+  const validToken = 'a'.repeat(64);
+  let now: number;
+  let record: PatientTokenRecord;
+  let lookup: ReturnType<typeof vi.fn>;
+  let verifier: PatientTokenVerifier;
+
+  beforeEach(() => {
+    now = Date.parse('2026-01-01T00:00:00Z');
+    record = {
+      patientId: 'patient-1',
+      eventDateId: 'event-date-1',
+      expiresAt: '2026-01-31T00:00:00Z'
+    };
+    lookup = vi.fn(async (token: string) => (token === validToken ? record : null));
+    verifier = new PatientTokenVerifier({
+      lookup,
+      ttlMs: 60_000,
+      negativeTtlMs: 10_000,
+      now: () => now
+    });
+  });
+
+  it('should query the database only on cache miss', async () => {
+    expect(await verifier.verify(validToken)).toEqual(record);
+    expect(await verifier.verify(validToken)).toEqual(record);
+
+    expect(lookup).toHaveBeenCalledTimes(1);
+    expect(verifier.getStats()).toMatchObject({ lookups: 2, hits: 1, dbQueries: 1, dbHitRate: 0.5 });
+  });
+
+  it('should negatively cache unknown tokens', async () => {
+    expect(await verifier.verify('invalid')).toBeNull();
+    expect(await verifier.verify('invalid')).toBeNull();
+
+    expect(lookup).toHaveBeenCalledTimes(1);
+    expect(verifier.getStats().negativeHits).toBe(1);
+
+    now += 10_000;
+    await verifier.verify('invalid');
+    expect(lookup).toHaveBeenCalledTimes(2);
+  });
+
+  it('should drop a token when its revocation hash is received', async () => {
+    await verifier.verify(validToken);
+    lookup.mockResolvedValueOnce(null);
+
+    verifier.invalidate(await hashToken(validToken));
+
+    expect(await verifier.verify(validToken)).toBeNull();
+    expect(lookup).toHaveBeenCalledTimes(2);
+  });
+
+  it('should not cache past the token expiration', async () => {
+    record.expiresAt = new Date(now + 5_000).toISOString();
+
+    await verifier.verify(validToken);
+    now += 5_000;
+
+    expect(await verifier.verify(validToken)).toBeNull();
+  });
+
+  it('should not cache a lookup that raced with a revocation', async () => {
+    let resolveLookup: (value: PatientTokenRecord) => void = () => {};
+    lookup.mockImplementationOnce(() => new Promise(resolve => { resolveLookup = resolve; }));
+
+    const pending = verifier.verify(validToken);
+    await vi.waitFor(() => expect(lookup).toHaveBeenCalledTimes(1));
+    verifier.invalidate(await hashToken(validToken));
+    resolveLookup(record);
+    await pending;
+
+    await verifier.verify(validToken);
+    expect(lookup).toHaveBeenCalledTimes(2);
+  });
+
+  it('should not hand a pre-revocation lookup to calls arriving after the revocation', async () => {
+    let resolveLookup: (value: PatientTokenRecord) => void = () => {};
+    lookup.mockImplementationOnce(() => new Promise(resolve => { resolveLookup = resolve; }));
+    lookup.mockResolvedValueOnce(null);
+
+    const pending = verifier.verify(validToken);
+    await vi.waitFor(() => expect(lookup).toHaveBeenCalledTimes(1));
+    verifier.invalidate(await hashToken(validToken));
+
+    const late = verifier.verify(validToken);
+    await vi.waitFor(() => expect(lookup).toHaveBeenCalledTimes(2));
+    resolveLookup(record);
+
+    expect(await pending).toEqual(record);
+    expect(await late).toBeNull();
+    expect(verifier.getStats().coalesced).toBe(0);
+  });
+
+  it('should share a single database query between concurrent requests', async () => {
+    await Promise.all([verifier.verify(validToken), verifier.verify(validToken)]);
+
+    expect(lookup).toHaveBeenCalledTimes(1);
+    expect(verifier.getStats()).toMatchObject({ hits: 0, coalesced: 1, dbQueries: 1 });
+  });
+});
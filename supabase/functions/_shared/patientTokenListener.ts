@@ -0,0 +1,39 @@
+/**
+ * Patient Token Revocation Listener
+ * Assina o canal NOTIFY publicado pelo trigger de patient_access_tokens e
+ * invalida o cache do verificador quando um token é revogado ou alterado
+ */
+
+import postgres from 'https://deno.land/x/postgresjs@v3.4.4/mod.js'
+import type { PatientTokenRecord, PatientTokenVerifier } from './patientTokenVerifier.ts'
+
+export const PATIENT_TOKEN_CHANNEL = 'patient_access_tokens_changed'
+
+export type PostgresClient = ReturnType<typeof postgres>
+
+/**
+ * Inicia o LISTEN em uma conexão dedicada. Requer conexão direta ao banco
+ * (porta 5432) - o pooler em modo transação não entrega notificações.
+ */
+export async function listenForTokenRevocations<R extends PatientTokenRecord>(
+  verifier: PatientTokenVerifier<R>,
+  databaseUrl: string,
+  channel: string = PATIENT_TOKEN_CHANNEL
+): Promise<PostgresClient> {
+  const sql = postgres(databaseUrl, { max: 1, connect_timeout: 5 })
+
+  await sql.listen(
+    channel,
+    (tokenHash: string) => {
+      verifier.invalidate(tokenHash)
+    },
+    () => {
+      // Chamado a cada (re)conexão: notificações emitidas enquanto a
+      // conexão estava fora do ar foram perdidas, então o cache é descartado
+      console.log('🔔 LISTEN ativo em', channel)
+      verifier.clear()
+    }
+  )
+
+  return sql
+}
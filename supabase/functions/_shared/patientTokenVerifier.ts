@@ -0,0 +1,183 @@
+/**
+ * Patient Token Verifier
+ * Verifica tokens de acesso do portal do paciente com cache em memória
+ * (hash do token -> dados do paciente), cache negativo para tokens
+ * inexistentes e invalidação disparada pelas notificações de revogação do banco
+ *
+ * O cache negativo é por token exato: absorve retentativas do mesmo token
+ * inválido (links antigos, clientes em loop), não palpites únicos de força bruta
+ */
+
+import { LruTtlCache } from './tokenCache.ts'
+
+export interface PatientTokenRecord {
+  patientId: string
+  eventDateId: string | null
+  expiresAt: string
+}
+
+export type PatientTokenLookup<R extends PatientTokenRecord = PatientTokenRecord> =
+  (token: string) => Promise<R | null>
+
+export interface PatientTokenVerifierOptions<R extends PatientTokenRecord = PatientTokenRecord> {
+  lookup: PatientTokenLookup<R>
+  maxEntries?: number
+  ttlMs?: number
+  maxNegativeEntries?: number
+  negativeTtlMs?: number
+  now?: () => number
+}
+
+export interface PatientTokenVerifierStats {
+  lookups: number
+  hits: number
+  negativeHits: number
+  coalesced: number
+  dbQueries: number
+  dbHitRate: number
+}
+
+const DEFAULT_MAX_ENTRIES = 10_000
+const DEFAULT_TTL_MS = 5 * 60 * 1000 // 5 minutos
+const DEFAULT_MAX_NEGATIVE_ENTRIES = 50_000
+const DEFAULT_NEGATIVE_TTL_MS = 60 * 1000 // 1 minuto
+
+/**
+ * Calcula o SHA-256 (hex) do token; o mesmo valor é publicado pelo trigger
+ * de revogação, então o token em texto puro nunca fica retido no cache
+ */
+export async function hashToken(token: string): Promise<string> {
+  const data = new TextEncoder().encode(token)
+  const hashBuffer = await crypto.subtle.digest('SHA-256', data)
+  return Array.from(new Uint8Array(hashBuffer))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('')
+}
+
+export class PatientTokenVerifier<R extends PatientTokenRecord = PatientTokenRecord> {
+  private readonly lookup: PatientTokenLookup<R>
+  private readonly now: () => number
+  private readonly ttlMs: number
+  private readonly positive: LruTtlCache<R>
+  // Cache separado para que tokens inválidos não expulsem tokens válidos
+  private readonly negative: LruTtlCache<true>
+  private readonly inFlight = new Map<string, Promise<R | null>>()
+  // Incrementado a cada invalidação; consultas iniciadas antes não são cacheadas
+  private epoch = 0
+  private stats = { lookups: 0, hits: 0, negativeHits: 0, coalesced: 0, dbQueries: 0 }
+
+  constructor(options: PatientTokenVerifierOptions<R>) {
+    this.lookup = options.lookup
+    this.now = options.now ?? Date.now
+    this.ttlMs = options.ttlMs ?? DEFAULT_TTL_MS
+    this.positive = new LruTtlCache({
+      maxEntries: options.maxEntries ?? DEFAULT_MAX_ENTRIES,
+      defaultTtlMs: this.ttlMs,
+      now: this.now
+    })
+    this.negative = new LruTtlCache({
+      maxEntries: options.maxNegativeEntries ?? DEFAULT_MAX_NEGATIVE_ENTRIES,
+      defaultTtlMs: options.negativeTtlMs ?? DEFAULT_NEGATIVE_TTL_MS,
+      now: this.now
+    })
+  }
+
+  /**
+   * Retorna o registro do token se válido e não expirado, ou null
+   */
+  async verify(token: string): Promise<R | null> {
+    this.stats.lookups++
+
+    const tokenHash = await hashToken(token)
+
+    const cached = this.positive.get(tokenHash)
+    if (cached) {
+      if (Date.parse(cached.expiresAt) > this.now()) {
+        this.stats.hits++
+        return cached
+      }
+      this.positive.delete(tokenHash)
+    }
+
+    if (this.negative.has(tokenHash)) {
+      this.stats.negativeHits++
+      return null
+    }
+
+    // Reaproveita a consulta em andamento (não conta como hit do cache)
+    const pending = this.inFlight.get(tokenHash)
+    if (pending) {
+      this.stats.coalesced++
+      return pending
+    }
+
+    const request = this.fetchAndCache(token, tokenHash)
+    this.inFlight.set(tokenHash, request)
+    try {
+      return await request
+    } finally {
+      // Uma invalidação pode ter liberado a chave para uma consulta mais nova
+      if (this.inFlight.get(tokenHash) === request) {
+        this.inFlight.delete(tokenHash)
+      }
+    }
+  }
+
+  /**
+   * Remove um token do cache (chamado ao receber NOTIFY de revogação)
+   */
+  invalidate(tokenHash: string): void {
+    this.epoch++
+    this.positive.delete(tokenHash)
+    this.negative.delete(tokenHash)
+    // Chamadas posteriores não devem receber o resultado anterior à revogação
+    this.inFlight.delete(tokenHash)
+  }
+
+  /**
+   * Limpa todo o cache; usado quando notificações podem ter sido perdidas
+   */
+  clear(): void {
+    this.epoch++
+    this.positive.clear()
+    this.negative.clear()
+    this.inFlight.clear()
+  }
+
+  getStats(): PatientTokenVerifierStats {
+    return {
+      ...this.stats,
+      dbHitRate: this.stats.lookups > 0 ? this.stats.dbQueries / this.stats.lookups : 0
+    }
+  }
+
+  resetStats(): void {
+    this.stats = { lookups: 0, hits: 0, negativeHits: 0, coalesced: 0, dbQueries: 0 }
+  }
+
+  private async fetchAndCache(
+    token: string,
+    tokenHash: string
+  ): Promise<R | null> {
+    const startEpoch = this.epoch
+    this.stats.dbQueries++
+
+    const record = await this.lookup(token)
+    const remainingMs = record ? Date.parse(record.expiresAt) - this.now() : 0
+    const valid = record && remainingMs > 0 ? record : null
+
+    // Uma revogação chegou durante a consulta: responde sem cachear
+    if (startEpoch !== this.epoch) {
+      return valid
+    }
+
+    if (!valid) {
+      this.negative.set(tokenHash, true)
+      return null
+    }
+
+    // Nunca manter no cache além da expiração do próprio token
+    this.positive.set(tokenHash, valid, Math.min(remainingMs, this.ttlMs))
+    return valid
+  }
+}
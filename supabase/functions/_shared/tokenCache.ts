@@ -0,0 +1,84 @@
+/**
+ * LRU + TTL Cache
+ * Cache em memória do processo (isolate) com expiração por entrada e
+ * descarte do item menos recentemente usado quando a capacidade é atingida
+ */
+
+interface CacheEntry<V> {
+  value: V
+  expiresAt: number
+}
+
+export interface LruTtlCacheOptions {
+  maxEntries: number
+  defaultTtlMs: number
+  now?: () => number
+}
+
+export class LruTtlCache<V> {
+  // Map preserva a ordem de inserção: a primeira chave é sempre a menos recente
+  private entries = new Map<string, CacheEntry<V>>()
+  private readonly maxEntries: number
+  private readonly defaultTtlMs: number
+  private readonly now: () => number
+
+  constructor(options: LruTtlCacheOptions) {
+    if (options.maxEntries <= 0) {
+      throw new Error('maxEntries deve ser maior que zero')
+    }
+
+    this.maxEntries = options.maxEntries
+    this.defaultTtlMs = options.defaultTtlMs
+    this.now = options.now ?? Date.now
+  }
+
+  get size(): number {
+    return this.entries.size
+  }
+
+  /**
+   * Retorna o valor se presente e não expirado, promovendo-o a mais recente
+   */
+  get(key: string): V | undefined {
+    const entry = this.entries.get(key)
+    if (!entry) {
+      return undefined
+    }
+
+    if (entry.expiresAt <= this.now()) {
+      this.entries.delete(key)
+      return undefined
+    }
+
+    this.entries.delete(key)
+    this.entries.set(key, entry)
+    return entry.value
+  }
+
+  has(key: string): boolean {
+    return this.get(key) !== undefined
+  }
+
+  set(key: string, value: V, ttlMs: number = this.defaultTtlMs): void {
+    if (ttlMs <= 0) {
+      this.entries.delete(key)
+      return
+    }
+
+    this.entries.delete(key)
+    this.entries.set(key, { value, expiresAt: this.now() + ttlMs })
+
+    while (this.entries.size > this.maxEntries) {
+      const oldestKey = this.entries.keys().next().value as string
+      this.entries.delete(oldestKey)
+    }
+  }
+
+  delete(key: string): boolean {
+    return this.entries.delete(key)
+  }
+
+  clear(): void {
+    this.entries.clear()
+  }
+}
@@ -0,0 +1,174 @@
+/**
+ * Verify Patient Token - Valida tokens de acesso do portal do paciente
+ * Retorna os dados exibidos no portal; patient_access_tokens só é consultada
+ * em cache miss e revogações chegam via LISTEN/NOTIFY (ver migration
+ * notify_patient_access_token_changes)
+ */
+
+import { serve } from 'https://deno.land/std@0.168.0/http/server.ts'
+import { createClient } from 'https://esm.sh/@supabase/supabase-js@2'
+import { corsHeaders } from '../_shared/cors.ts'
+import { PatientTokenRecord, PatientTokenVerifier } from '../_shared/patientTokenVerifier.ts'
+import { listenForTokenRevocations } from '../_shared/patientTokenListener.ts'
+
+interface VerifyTokenRequest {
+  token: string
+}
+
+interface PortalTokenRecord extends PatientTokenRecord {
+  patient: {
+    nome: string
+    email: string
+    telefone: string
+  }
+  event: {
+    title: string
+    location: string
+    address: string | null
+    date: string
+    start_time: string
+    end_time: string
+  } | null
+}
+
+// Tempo máximo que uma requisição espera o LISTEN ficar ativo antes de
+// consultar o banco diretamente, sem cache
+const LISTENER_WAIT_MS = 200
+
+const supabase = createClient(
+  Deno.env.get('SUPABASE_URL')!,
+  Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+)
+
+async function lookupPortalToken(token: string): Promise<PortalTokenRecord | null> {
+  const { data, error } = await supabase
+    .from('patient_access_tokens')
+    .select(`
+      patient_id,
+      event_date_id,
+      expires_at,
+      patient:patients(nome, email, telefone),
+      event_date:event_dates(
+        date,
+        start_time,
+        end_time,
+        event:events(title, location, address)
+      )
+    `)
+    .eq('token', token)
+    .gt('expires_at', new Date().toISOString())
+    .maybeSingle()
+
+  if (error) {
+    throw error
+  }
+
+  if (!data) {
+    return null
+  }
+
+  const eventDate = data.event_date
+  return {
+    patientId: data.patient_id,
+    eventDateId: data.event_date_id,
+    expiresAt: data.expires_at,
+    patient: data.patient,
+    event: eventDate
+      ? {
+          title: eventDate.event?.title,
+          location: eventDate.event?.location,
+          address: eventDate.event?.address ?? null,
+          date: eventDate.date,
+          start_time: eventDate.start_time,
+          end_time: eventDate.end_time
+        }
+      : null
+  }
+}
+
+// Instância no escopo do módulo: reaproveitada enquanto o isolate estiver ativo.
+// Alterações em patients/events só aparecem após o TTL do cache (5 minutos).
+const verifier = new PatientTokenVerifier<PortalTokenRecord>({ lookup: lookupPortalToken })
+
+// Só usa o cache depois que o LISTEN estiver ativo; sem ele não há como
+// saber de revogações
+let cacheEnabled = false
+
+const databaseUrl = Deno.env.get('SUPABASE_DB_URL')
+const listenerReady: Promise<boolean> = databaseUrl
+  ? listenForTokenRevocations(verifier, databaseUrl).then(
+      () => {
+        cacheEnabled = true
+        return true
+      },
+      (error) => {
+        console.error('❌ Erro ao iniciar LISTEN de revogação de tokens:', error)
+        return false
+      }
+    )
+  : Promise.resolve(false)
+
+async function waitForListener(): Promise<boolean> {
+  if (cacheEnabled) {
+    return true
+  }
+
+  let timer: number | undefined
+  const timeout = new Promise<boolean>((resolve) => {
+    timer = setTimeout(() => resolve(false), LISTENER_WAIT_MS)
+  })
+
+  try {
+    return await Promise.race([listenerReady, timeout])
+  } finally {
+    clearTimeout(timer)
+  }
+}
+
+function jsonResponse(body: Record<string, unknown>, status: number): Response {
+  return new Response(
+    JSON.stringify(body),
+    { status, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+  )
+}
+
+serve(async (req) => {
+  // Handle CORS preflight requests
+  if (req.method === 'OPTIONS') {
+    return new Response('ok', { headers: corsHeaders })
+  }
+
+  let token: VerifyTokenRequest['token'] | undefined
+  try {
+    const body: VerifyTokenRequest = await req.json()
+    token = body?.token
+  } catch {
+    token = undefined
+  }
+
+  if (!token || typeof token !== 'string') {
+    return jsonResponse({ valid: false, error: 'Token de acesso não fornecido' }, 400)
+  }
+
+  try {
+    const record = (await waitForListener())
+      ? await verifier.verify(token)
+      : await lookupPortalToken(token)
+
+    if (!record) {
+      return jsonResponse({ valid: false, error: 'Link de acesso inválido ou expirado' }, 401)
+    }
+
+    return jsonResponse({
+      valid: true,
+      patient_id: record.patientId,
+      event_date_id: record.eventDateId,
+      expires_at: record.expiresAt,
+      patient: record.patient,
+      event: record.event
+    }, 200)
+  } catch (error) {
+    console.error('❌ Erro ao verificar token do paciente:', error)
+    return jsonResponse({ valid: false, error: 'Erro interno ao verificar token' }, 500)
+  }
+})
@@ -0,0 +1,37 @@
+-- Migration: Notify patient access token changes
+-- Date: 2026-10-19
+-- Purpose: Publish token hash on patient_access_tokens changes so the
+-- verify-patient-token edge function can invalidate its in-memory cache
+
+-- Publica o SHA-256 do token (nunca o token em texto puro)
+CREATE OR REPLACE FUNCTION public.notify_patient_access_token_change()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SET search_path = public, extensions
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM pg_notify(
+      'patient_access_tokens_changed',
+      encode(digest(OLD.token, 'sha256'), 'hex')
+    );
+  END IF;
+
+  -- INSERT (ou troca de token) limpa eventual cache negativo do novo valor
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.token IS DISTINCT FROM OLD.token) THEN
+    PERFORM pg_notify(
+      'patient_access_tokens_changed',
+      encode(digest(NEW.token, 'sha256'), 'hex')
+    );
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_notify_patient_access_token_change ON public.patient_access_tokens;
+
+CREATE TRIGGER trg_notify_patient_access_token_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.patient_access_tokens
+  FOR EACH ROW
+  EXECUTE FUNCTION public.notify_patient_access_token_change();